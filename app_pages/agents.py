@@ -1,8 +1,10 @@
 import streamlit as st
 from google.api_core import exceptions as google_exceptions
 from google.cloud import geminidataanalytics
-from state import fetch_agents_state
+from state import fetch_agents_state, invalidate_agents_state
 from utils.agents import get_time_delta_string
+from utils.catalog import get_schema_catalog
+from utils.chat import format_agent_datasource_refs
 import uuid
 import time
 
@@ -16,7 +18,7 @@ def agents_main():
         st.subheader("Data agents available")
         if st.button("Refresh agents"):
             with st.spinner("Refreshing..."):
-                fetch_agents_state()
+                fetch_agents_state(use_cache=False)
 
     # Agent list
     with st.container(border=True, height=450):
@@ -52,6 +54,17 @@ def agents_main():
                         disabled=True,
                         key=f"datasrc-{ag.name}"
                     )
+                    # Schemas come from the process-wide catalog filled by chat responses,
+                    # limited to the ones this user's own chats have resolved
+                    catalog = get_schema_catalog()
+                    resolved_refs = state.get("resolved_refs", {})
+                    for ref in format_agent_datasource_refs(ag.data_analytics_agent.published_context.datasource_references):
+                        schema_df = catalog.get(ref, resolved_refs[ref]) if ref in resolved_refs else None
+                        if schema_df is not None:
+                            st.markdown(f"**Schema** ({ref}):")
+                            st.dataframe(schema_df)
+                        else:
+                            st.caption(f"Schema for {ref} not resolved yet, chat with the agent to load it.")
                     with st.container(horizontal=True,horizontal_alignment="distribute"):
                         if st.button("**Update agent**", key=f"update-{ag.name}"):
                             agent = geminidataanalytics.DataAgent()
@@ -68,7 +81,8 @@ def agents_main():
 
                             try:
                                 state.agent_client.update_data_agent(request=request).result()
-                                fetch_agents_state()
+                                invalidate_agents_state()
+                                fetch_agents_state(use_cache=False)
                                 st.success("Succesfully updated data agent")
                             except Exception as e:
                                 st.error(f"Error updating data agent: {e}")
@@ -79,7 +93,8 @@ def agents_main():
                             )
                             try:
                                 operation = state.agent_client.delete_data_agent(request=request).result()
-                                fetch_agents_state()
+                                invalidate_agents_state()
+                                fetch_agents_state(use_cache=False)
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Error deleting Data Agent: {e}")
@@ -147,7 +162,8 @@ def agents_main():
             try:
                 state.agent_client.create_data_agent(request=request)
                 st.success(f"Agent '{display_name}' successfully created")
-                fetch_agents_state()
+                invalidate_agents_state()
+                fetch_agents_state(use_cache=False)
             except google_exceptions.GoogleAPICallError as e:
                 st.error(f"API error creating agent: {e}")
             except Exception as e:
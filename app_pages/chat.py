@@ -1,7 +1,7 @@
 import os
 import streamlit as st
 from google.cloud import geminidataanalytics
-from state import create_convo, fetch_convos_state, fetch_messages_state
+from state import create_convo, fetch_convos_state, fetch_messages_state, store_messages_state
 from utils.chat import show_message
 
 AGENT_SELECT_KEY = "agent_selectbox_value"
@@ -103,10 +103,10 @@ def conversations_main():
         st.stop()
 
     # Chat history
-    for message in state.convo_messages:
+    for index, message in enumerate(state.convo_messages):
         if "system_message" in message:
             with st.chat_message("assistant"):
-                show_message(message)
+                show_message(message, key=message_key(index))
         else:
             with st.chat_message("user"):
                 st.markdown(message.user_message.text)
@@ -144,10 +144,16 @@ def conversations_main():
                     conversation_reference=convo_ref,
                 )
                 for message in state.chat_client.chat(request=req):
-                    show_message(message)
+                    show_message(message, key=message_key(len(state.convo_messages)))
                     state.convo_messages.append(message)
+                store_messages_state(state.current_convo)
             st.rerun()
 
+# Widget key for a message, by its position in the current convo
+def message_key(index):
+    convo = st.session_state.current_convo
+    return f"{convo.name if convo else ''}-{index}"
+
 def is_looker_agent(agent) -> bool:
     datasource_references = agent.data_analytics_agent.published_context.datasource_references
 
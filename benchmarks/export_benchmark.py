@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import proto
+from google.protobuf import struct_pb2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.export import EXPORT_CHUNK_ROWS, WRITERS, export_bytes, result_columns
+
+# Throughput of the result export, run with:
+#   python benchmarks/export_benchmark.py --rows 200000
+# Rows are proto-plus Struct messages like DataResult.data in the API response,
+# and go through result_columns/export_bytes exactly as in the chat page.
+
+# Same shape as geminidataanalytics.DataResult (schema.fields and data)
+class Field(proto.Message):
+    name = proto.Field(proto.STRING, number=1)
+    type = proto.Field(proto.STRING, number=2)
+    mode = proto.Field(proto.STRING, number=3)
+
+class Schema(proto.Message):
+    fields = proto.RepeatedField(proto.MESSAGE, number=1, message=Field)
+
+class DataResult(proto.Message):
+    schema = proto.Field(proto.MESSAGE, number=1, message=Schema)
+    data = proto.RepeatedField(proto.MESSAGE, number=2, message=struct_pb2.Struct)
+
+FIELDS = [
+    ("id", "INT64"),
+    ("name", "STRING"),
+    ("category", "STRING"),
+    ("amount", "FLOAT64"),
+    ("active", "BOOL"),
+    ("created", "DATE"),
+    ("tags", "STRING"),
+]
+
+def build_result(n):
+    result = DataResult(schema=Schema(fields=[
+        Field(name=name, type=type_name, mode="REPEATED" if name == "tags" else "NULLABLE")
+        for name, type_name in FIELDS
+    ]))
+    for i in range(n):
+        result.data.append({
+            # BigQuery sends INT64 as text
+            "id": str(i),
+            "name": f"customer-{i}",
+            "category": ("books", "garden", "toys", "tools")[i % 4],
+            "amount": i * 1.25,
+            "active": i % 3 == 0,
+            "created": f"2025-01-{i % 28 + 1:02d}",
+            "tags": ["new", "web"] if i % 2 else [],
+        })
+    return result
+
+def run(fmt, result, chunk_rows):
+    start = time.perf_counter()
+    fields, types, rows = result_columns(result)
+    data = export_bytes(fields, rows, fmt, chunk_rows, types)
+    elapsed = time.perf_counter() - start
+    return len(result.data), elapsed, len(data)
+
+# Separate pass, tracemalloc slows allocation-heavy code down too much to time it.
+# Includes the finished file, which export_bytes keeps in memory.
+def peak_memory(fmt, result, chunk_rows):
+    tracemalloc.start()
+    fields, types, rows = result_columns(result)
+    export_bytes(fields, rows, fmt, chunk_rows, types)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    parser.add_argument("--formats", nargs="*", default=list(WRITERS))
+    parser.add_argument("--memory-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    result = build_result(args.rows)
+    memory_result = build_result(min(args.rows, args.memory_rows))
+
+    print(f"{'format':<8} {'rows':>10} {'rows/s':>12} {'MB/s':>8} {'output MB':>10} {'peak MB':>8}")
+    for fmt in args.formats:
+        count, elapsed, size = run(fmt, result, args.chunk_rows)
+        peak = peak_memory(fmt, memory_result, args.chunk_rows)
+        print(
+            f"{fmt:<8} {count:>10} {count / elapsed:>12,.0f} "
+            f"{size / elapsed / 1e6:>8.1f} {size / 1e6:>10.1f} {peak / 1e6:>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ import os
 import streamlit as st
 from google.cloud import geminidataanalytics
 from google.api_core import exceptions as google_exceptions
+from google.auth import jwt
+from google.auth.transport.requests import AuthorizedSession
 from dotenv import load_dotenv
+from utils.cache import NullCache, UserCache, create_cache_backend, dump_protos, load_protos
 
 load_dotenv(override=True)
 
@@ -10,6 +13,40 @@ PROJECT_ID = os.getenv("PROJECT_ID")
 LOOKER_CLIENT_ID = os.getenv("LOOKER_CLIENT_ID")
 LOOKER_CLIENT_SECRET = os.getenv("LOOKER_CLIENT_SECRET")
 
+AGENTS_NAMESPACE = "agents"
+CONVOS_NAMESPACE = "convos"
+MESSAGES_NAMESPACE = "messages"
+
+# One backend per process, shared by all sessions (see CACHE_BACKEND in readme)
+@st.cache_resource
+def get_cache_backend():
+    return create_cache_backend()
+
+USERINFO_URL = "https://openidconnect.googleapis.com/v1/userinfo"
+
+# Stable across sessions and replicas so a user's cache follows them.
+# Returns None if the user cannot be identified.
+def get_user_id(creds):
+    try:
+        if getattr(creds, "id_token", None):
+            return jwt.decode(creds.id_token, verify=False)["sub"]
+    except Exception:
+        pass
+
+    try:
+        resp = AuthorizedSession(creds).get(USERINFO_URL, timeout=10)
+        resp.raise_for_status()
+        return resp.json()["sub"]
+    except Exception:
+        return None
+
+# Caching is skipped for users without a stable id
+def get_user_cache(creds):
+    user_id = get_user_id(creds)
+    if user_id is None:
+        return UserCache(NullCache(), "")
+    return UserCache(get_cache_backend(), user_id)
+
 # Depends on session_state.creds being set
 # Only runs once for whole session
 def init_state():
@@ -19,6 +56,7 @@ def init_state():
     state.agents = []
     state.convos = []
     state.convo_messages = []
+    state.cache = get_user_cache(state.creds)
 
     state.agent_client = geminidataanalytics.DataAgentServiceClient(credentials=state.creds)
 
@@ -43,18 +81,26 @@ def init_state():
     state.initialized = True
     st.rerun()
 
-# fetch all agents
-def fetch_agents_state(rerun=True):
+# fetch all agents, served from the shared cache unless use_cache is False
+def fetch_agents_state(rerun=True, use_cache=True):
     state = st.session_state
     client = state.agent_client
     project_id = state.project_id
 
     try:
+        cached = state.cache.get(AGENTS_NAMESPACE, project_id) if use_cache else None
+        if cached is not None:
+            state.agents = load_protos(geminidataanalytics.DataAgent, cached)
+            if rerun:
+                st.rerun()
+            return
+
         request = geminidataanalytics.ListDataAgentsRequest(
             parent=f"projects/{project_id}/locations/global"
         )
         agents = list(client.list_data_agents(request=request))
         state.agents = agents if len(agents) > 0 else []
+        state.cache.set(AGENTS_NAMESPACE, project_id, dump_protos(state.agents))
         if rerun:
             st.rerun()
     except google_exceptions.GoogleAPICallError as e:
@@ -63,7 +109,7 @@ def fetch_agents_state(rerun=True):
         st.error(f"Unexpected error: {e}")
 
 # Limited to fetching 100 conversations from selected agent
-def fetch_convos_state(agent=None, rerun=True):
+def fetch_convos_state(agent=None, rerun=True, use_cache=True):
     if agent is None:
         return
 
@@ -73,6 +119,13 @@ def fetch_convos_state(agent=None, rerun=True):
     project_id = state.project_id
 
     try:
+        cached = state.cache.get(CONVOS_NAMESPACE, agent.name) if use_cache else None
+        if cached is not None:
+            state.convos = load_protos(geminidataanalytics.Conversation, cached)
+            if rerun:
+                st.rerun()
+            return
+
         # TODO: get filter property on request to work
         request = geminidataanalytics.ListConversationsRequest(
             parent=f"projects/{project_id}/locations/global",
@@ -82,6 +135,7 @@ def fetch_convos_state(agent=None, rerun=True):
         convos = list(client.list_conversations(request=request))
         convos = [c for c in convos if c.agents[0] == agent.name]
         state.convos = convos if len(convos) > 0 else []
+        state.cache.set(CONVOS_NAMESPACE, agent.name, dump_protos(state.convos))
         if rerun:
             st.rerun()
 
@@ -91,7 +145,7 @@ def fetch_convos_state(agent=None, rerun=True):
         st.error(f"Unexpected error: {e}")
 
 # Fetch messages for selected convo
-def fetch_messages_state(convo=None, rerun=True):
+def fetch_messages_state(convo=None, rerun=True, use_cache=True):
     if convo is None:
         return
 
@@ -101,9 +155,17 @@ def fetch_messages_state(convo=None, rerun=True):
     request = geminidataanalytics.ListMessagesRequest(parent=convo.name)
 
     try:
+        cached = state.cache.get(MESSAGES_NAMESPACE, convo.name) if use_cache else None
+        if cached is not None:
+            state.convo_messages = load_protos(geminidataanalytics.Message, cached)
+            if rerun:
+                st.rerun()
+            return
+
         msgs = list(client.list_messages(request=request))
         msgs = [m.message for m in msgs]
         state.convo_messages = list(reversed(msgs)) if len(msgs) > 0 else []
+        state.cache.set(MESSAGES_NAMESPACE, convo.name, dump_protos(state.convo_messages))
         if rerun:
             st.rerun()
     except google_exceptions.GoogleAPICallError as e:
@@ -128,8 +190,26 @@ def create_convo(agent=None):
     try:
         convo = client.create_conversation(request=request)
         state.convos.insert(0, convo)
+        state.cache.set(CONVOS_NAMESPACE, agent.name, dump_protos(state.convos))
         return convo
     except google_exceptions.GoogleAPICallError as e:
         st.error(f"API error creating convo: {e}")
     except Exception as e:
         st.error(f"Unexpected error: {e}")
+
+# Writes the current convo's history back to the shared cache after a chat turn
+def store_messages_state(convo=None):
+    if convo is None:
+        return
+
+    state = st.session_state
+    try:
+        state.cache.set(MESSAGES_NAMESPACE, convo.name, dump_protos(state.convo_messages))
+        # last_used_time changed, drop the listing for every agent of this user
+        state.cache.invalidate(CONVOS_NAMESPACE)
+    except Exception as e:
+        st.error(f"Unexpected error caching messages: {e}")
+
+# Drops cached agents of this user on every replica, used after agent mutations
+def invalidate_agents_state():
+    st.session_state.cache.invalidate(AGENTS_NAMESPACE)
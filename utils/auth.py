@@ -58,6 +58,7 @@ async def getCreds(
             creds = Credentials(
                 token=token["access_token"],
                 token_uri="https://oauth2.googleapis.com/token",
+                id_token=token.get("id_token"),
                 client_id=GOOGLE_CLIENT_ID,
                 client_secret=GOOGLE_CLIENT_SECRET,
                 scopes=SCOPES,
@@ -0,0 +1,237 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Shared cache tier for listing fetches and decoded conversation history.
+# Backends only deal in bytes so that every replica behind a load balancer
+# can read what another replica wrote.
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", ".cache/ca_api_cache.sqlite3")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Expired entries are swept on set, at most once per interval
+CACHE_SWEEP_SECONDS = 60
+
+class CacheBackend:
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    # Atomically increments an integer counter (never expires), returns new value
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+# Lives inside one Python process, shared by every session of that process.
+# Values are evicted least recently used first once they exceed max_bytes.
+class InMemoryCache(CacheBackend):
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        # Version counters are kept apart so eviction can never reset them
+        self._counters = {}
+        self._last_sweep = time.time()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._remove(key)
+            # Would evict everything else and then itself, don't cache it at all
+            if len(value) > self.max_bytes:
+                return
+            self._entries[key] = (value, expires_at)
+            self._size += len(value)
+            self._sweep()
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+    def _sweep(self):
+        now = time.time()
+        if now - self._last_sweep < CACHE_SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        expired = [k for k, (_, expires_at) in self._entries.items()
+                   if expires_at is not None and expires_at <= now]
+        for key in expired:
+            self._remove(key)
+
+# Local out-of-process cache, shared by every replica on the same host.
+# Uses WAL mode, which does not work on network filesystems.
+class SqliteCache(CacheBackend):
+    def __init__(self, path: str):
+        self.path = path
+        self._last_sweep = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def _connect(self):
+        # One connection per operation, Streamlit serves sessions from many threads
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return _closing(conn)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                conn.execute(
+                    "DELETE FROM cache WHERE key = ? AND expires_at <= ?",
+                    (key, time.time()),
+                )
+                return None
+            return bytes(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            # Entries under an invalidated version are never read again, drop them once expired
+            if now - self._last_sweep >= CACHE_SWEEP_SECONDS:
+                self._last_sweep = now
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                new_value = (int(bytes(row[0])) if row else 0) + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, NULL)",
+                    (key, str(new_value).encode()),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return new_value
+
+# Used when the user cannot be identified, nothing is shared or kept
+class NullCache(CacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+class _closing:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
+
+def create_cache_backend(kind: str = CACHE_BACKEND, path: str = CACHE_PATH) -> CacheBackend:
+    if kind == "memory":
+        return InMemoryCache()
+    if kind == "sqlite":
+        return SqliteCache(path)
+    raise ValueError(f"Unknown CACHE_BACKEND '{kind}', expected 'memory' or 'sqlite'")
+
+# Scopes every key to one user and adds per-namespace versions.
+# Invalidating a namespace bumps its version so stale entries are never read
+# again on any replica, and are swept by the backend once their TTL passes.
+class UserCache:
+    def __init__(self, backend: CacheBackend, user_id: str, ttl: int = CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.user_key = hashlib.sha256(user_id.encode()).hexdigest()
+        self.ttl = ttl
+
+    def _version_key(self, namespace):
+        return f"user:{self.user_key}:{namespace}:version"
+
+    def _key(self, namespace, key):
+        version = self.backend.get(self._version_key(namespace)) or b"0"
+        return f"user:{self.user_key}:{namespace}:v{int(version)}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.backend.get(self._key(namespace, key))
+
+    def set(self, namespace: str, key: str, value: bytes):
+        self.backend.set(self._key(namespace, key), value, self.ttl)
+
+    def delete(self, namespace: str, key: str):
+        self.backend.delete(self._key(namespace, key))
+
+    def invalidate(self, namespace: str):
+        self.backend.incr(self._version_key(namespace))
+
+# proto-plus messages are stored in their wire format
+def dump_protos(msgs) -> bytes:
+    return json.dumps(
+        [base64.b64encode(type(m).serialize(m)).decode() for m in msgs]
+    ).encode()
+
+def load_protos(cls, data: bytes):
+    return [cls.deserialize(base64.b64decode(m)) for m in json.loads(data)]
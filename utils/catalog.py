@@ -0,0 +1,59 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+# Process-wide catalog of resolved datasource schemas, keyed by the same
+# reference strings shown in chat (format_bq_table_ref / format_looker_table_ref).
+# The same tables come back in the schema and data stages of almost every turn,
+# so each distinct schema is turned into a DataFrame once and shared by all sessions.
+
+SCHEMA_CATALOG_MAX_ENTRIES = int(os.getenv("SCHEMA_CATALOG_MAX_ENTRIES", "256"))
+
+def build_schema_frame(schema) -> pd.DataFrame:
+    fields = getattr(schema, 'fields')
+    return pd.DataFrame({
+        "Column": [getattr(field, 'name') for field in fields],
+        "Type": [getattr(field, 'type') for field in fields],
+        "Description": [getattr(field, 'description', '-') for field in fields],
+        "Mode": [getattr(field, 'mode') for field in fields],
+    })
+
+class SchemaCatalog:
+    def __init__(self, max_entries: int = SCHEMA_CATALOG_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (ref, fingerprint) -> frame, in LRU order
+        self._frames = OrderedDict()
+
+    # Returns the schema's fingerprint and shared frame, building the frame only if unseen
+    def put(self, ref: str, schema) -> Tuple[str, pd.DataFrame]:
+        fingerprint = hashlib.sha1(type(schema).serialize(schema)).hexdigest()
+        key = (ref, fingerprint)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return fingerprint, frame
+
+        frame = build_schema_frame(schema)
+
+        with self._lock:
+            frame = self._frames.setdefault(key, frame)
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+            return fingerprint, frame
+
+    # Frame of a schema returned by put, None if it has been evicted since
+    def get(self, ref: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            return self._frames.get((ref, fingerprint))
+
+@st.cache_resource
+def get_schema_catalog() -> SchemaCatalog:
+    return SchemaCatalog()
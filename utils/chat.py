@@ -7,20 +7,16 @@ from google.protobuf.json_format import MessageToDict
 
 import streamlit as st
 
+from utils.catalog import get_schema_catalog
+from utils.export import EXPORT_FORMATS, export_bytes, result_columns
+
 # Based off documentation: https://cloud.google.com/gemini/docs/conversational-analytics-api/build-agent-sdk#define_helper_functions
 
 def handle_text_response(resp):
   parts = getattr(resp, 'parts')
   st.markdown(''.join(parts))
 
-def display_schema(data):
-  fields = getattr(data, 'fields')
-  df = pd.DataFrame({
-    "Column": map(lambda field: getattr(field, 'name'), fields),
-    "Type": map(lambda field: getattr(field, 'type'), fields),
-    "Description": map(lambda field: getattr(field, 'description', '-'), fields),
-    "Mode": map(lambda field: getattr(field, 'mode'), fields)
-  })
+def display_schema(df):
   with st.expander("**Schema**:"):
     st.dataframe(df)
 
@@ -30,17 +26,37 @@ def format_looker_table_ref(table_ref):
 def format_bq_table_ref(table_ref):
   return '{}.{}.{}'.format(table_ref.project_id, table_ref.dataset_id, table_ref.table_id)
 
-def display_datasource(datasource):
-  source_name = ''
+def format_datasource_ref(datasource):
   if 'studio_datasource_id' in datasource:
-   source_name = getattr(datasource, 'studio_datasource_id')
+   return getattr(datasource, 'studio_datasource_id')
   elif 'looker_explore_reference' in datasource:
-   source_name = format_looker_table_ref(getattr(datasource, 'looker_explore_reference'))
+   return format_looker_table_ref(getattr(datasource, 'looker_explore_reference'))
   else:
-    source_name = format_bq_table_ref(getattr(datasource, 'bigquery_table_reference'))
+    return format_bq_table_ref(getattr(datasource, 'bigquery_table_reference'))
+
+# Same keys as format_datasource_ref, for the references an agent is published with
+def format_agent_datasource_refs(datasource_references):
+  refs = []
+  if 'bq' in datasource_references:
+    refs += [format_bq_table_ref(r) for r in datasource_references.bq.table_references]
+  if 'looker' in datasource_references:
+    refs += [format_looker_table_ref(r) for r in datasource_references.looker.explore_references]
+  if 'studio' in datasource_references:
+    refs += [r.datasource_id for r in datasource_references.studio.studio_references]
+  return refs
+
+def display_datasource(datasource):
+  source_name = format_datasource_ref(datasource)
 
   st.markdown("**Data source**: " + source_name)
-  display_schema(datasource.schema)
+  fingerprint, schema_df = get_schema_catalog().put(source_name, datasource.schema)
+  display_schema(schema_df)
+
+  # The catalog is shared by all users, remember which schema the API returned to this one
+  state = st.session_state
+  if "resolved_refs" not in state:
+    state.resolved_refs = {}
+  state.resolved_refs[source_name] = fingerprint
 
 def handle_schema_response(resp):
   if 'query' in resp:
@@ -50,7 +66,33 @@ def handle_schema_response(resp):
     for datasource in resp.result.datasources:
       display_datasource(datasource)
 
-def handle_data_response(resp):
+# Builds the export only when asked. Streamlit keeps download data in memory, so the
+# button is only rendered on the run right after "Prepare download".
+def display_export(result, key):
+  with st.container(horizontal=True):
+    fmt = st.selectbox(
+      "Export format",
+      list(EXPORT_FORMATS),
+      key=f"exportfmt-{key}",
+      label_visibility="collapsed"
+    )
+    if st.button("Prepare download", key=f"export-{key}"):
+      try:
+        fields, types, rows = result_columns(result)
+        data = export_bytes(fields, rows, fmt, types=types)
+        suffix, mime = EXPORT_FORMATS[fmt]
+        st.download_button(
+          "Download",
+          data,
+          file_name=f"result{suffix}",
+          mime=mime,
+          key=f"download-{key}",
+          on_click="ignore"
+        )
+      except Exception as e:
+        st.error(f"Error exporting data: {e}")
+
+def handle_data_response(resp, key=None):
   if 'query' in resp:
     query = resp.query
     st.markdown("**Retrieval query**")
@@ -77,6 +119,8 @@ def handle_data_response(resp):
 
     st.dataframe(df)
     st.session_state.lastDataFrame = df
+    if key is not None:
+      display_export(resp.result, key)
 
 def handle_chart_response(resp):
   def _convert(v):
@@ -100,13 +144,13 @@ def handle_chart_response(resp):
     chart = alt.Chart.from_dict(_convert(resp.result.vega_config))
     st.vega_lite_chart(json.loads(chart.to_json()))
 
-def show_message(msg):
+def show_message(msg, key=None):
   m = msg.system_message
   if 'text' in m:
     handle_text_response(getattr(m, 'text'))
   elif 'schema' in m:
     handle_schema_response(getattr(m, 'schema'))
   elif 'data' in m:
-    handle_data_response(getattr(m, 'data'))
+    handle_data_response(getattr(m, 'data'), key)
   elif 'chart' in m:
     handle_chart_response(getattr(m, 'chart'))
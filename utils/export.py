@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+import os
+from collections.abc import Mapping, Sequence
+from itertools import islice
+from typing import BinaryIO, Iterable, List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Writes a data result to CSV, Parquet or JSONL without building a DataFrame.
+# Rows are converted EXPORT_CHUNK_ROWS at a time. Streamlit 1.48 can only serve a
+# download from memory, so the finished file is held in memory while it is offered
+# and exports are limited by the memory available to the app.
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "10000"))
+
+CSV = "CSV"
+PARQUET = "Parquet"
+JSONL = "JSONL"
+
+EXPORT_FORMATS = {
+    CSV: (".csv", "text/csv"),
+    PARQUET: (".parquet", "application/vnd.apache.parquet"),
+    JSONL: (".jsonl", "application/jsonl"),
+}
+
+# Column names, (type, mode) pairs and row iterator of a data response result.
+# Rows are read lazily.
+def result_columns(result):
+    fields = result.schema.fields
+    return (
+        [field.name for field in fields],
+        [(field.type, field.mode) for field in fields],
+        iter(result.data),
+    )
+
+def iter_chunks(fields: List[str], rows: Iterable, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        yield [[_get(row, field) for field in fields] for row in chunk]
+
+def _get(row, field):
+    try:
+        return row[field]
+    except KeyError:
+        return None
+
+def _plain(v):
+    # Struct values come back as proto-plus map/repeated wrappers
+    if isinstance(v, Mapping):
+        return {k: _plain(el) for k, el in v.items()}
+    if isinstance(v, Sequence) and not isinstance(v, (str, bytes)):
+        return [_plain(el) for el in v]
+    return v
+
+def _csv_value(v):
+    v = _plain(v)
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, default=str)
+    return v
+
+def write_csv(fields, rows, out: BinaryIO, chunk_rows=EXPORT_CHUNK_ROWS, types=None) -> int:
+    count = 0
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    for chunk in iter_chunks(fields, rows, chunk_rows):
+        writer.writerows([[_csv_value(v) for v in row] for row in chunk])
+        out.write(buf.getvalue().encode("utf-8"))
+        buf.seek(0)
+        buf.truncate()
+        count += len(chunk)
+    out.write(buf.getvalue().encode("utf-8"))
+    return count
+
+def write_jsonl(fields, rows, out: BinaryIO, chunk_rows=EXPORT_CHUNK_ROWS, types=None) -> int:
+    count = 0
+    for chunk in iter_chunks(fields, rows, chunk_rows):
+        lines = [
+            json.dumps({field: _plain(v) for field, v in zip(fields, row)}, default=str)
+            for row in chunk
+        ]
+        out.write(("\n".join(lines) + "\n").encode("utf-8"))
+        count += len(chunk)
+    return count
+
+def _to_int(v):
+    # INT64 arrives as text, parse it directly so values above 2^53 stay exact
+    if isinstance(v, (bool, int)):
+        return int(v)
+    try:
+        return int(v)
+    except ValueError:
+        return int(float(v))
+
+def _to_bool(v):
+    return v if isinstance(v, bool) else str(v).lower() in ("true", "1")
+
+# BigQuery type -> (Arrow type, converter). Values arrive as JSON numbers or
+# strings, anything not listed (incl. NUMERIC, kept exact) is written as text.
+ARROW_TYPES = {
+    "INTEGER": (pa.int64(), _to_int),
+    "INT64": (pa.int64(), _to_int),
+    "FLOAT": (pa.float64(), float),
+    "FLOAT64": (pa.float64(), float),
+    "BOOLEAN": (pa.bool_(), _to_bool),
+    "BOOL": (pa.bool_(), _to_bool),
+}
+
+def _text(v):
+    return None if v is None else str(v)
+
+def _arrow_field(name, field_type=None):
+    type_name, mode = field_type or ("", "")
+    if mode == "REPEATED":
+        return pa.field(name, pa.string()), _text
+    arrow_type, convert = ARROW_TYPES.get((type_name or "").upper(), (pa.string(), _text))
+    return pa.field(name, arrow_type), convert
+
+def _arrow_column(values, arrow_field, convert):
+    converted = []
+    for v in values:
+        # Nested values are kept as JSON text, same as in CSV
+        v = _csv_value(v)
+        try:
+            converted.append(None if v is None else convert(v))
+        except (TypeError, ValueError):
+            # Value does not match the declared type, e.g. "NaN" text in an INT64 column
+            converted.append(None)
+    return pa.array(converted, type=arrow_field.type)
+
+def write_parquet(fields, rows, out: BinaryIO, chunk_rows=EXPORT_CHUNK_ROWS, types=None) -> int:
+    # Schema comes from the result's field types up front, never from the data
+    types = types or [None] * len(fields)
+    arrow_fields = [_arrow_field(name, t) for name, t in zip(fields, types)]
+    schema = pa.schema([f for f, _ in arrow_fields])
+
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in iter_chunks(fields, rows, chunk_rows):
+            arrays = [
+                _arrow_column(col, f, convert)
+                for col, (f, convert) in zip(zip(*chunk), arrow_fields)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(chunk)
+    return count
+
+WRITERS = {
+    CSV: write_csv,
+    PARQUET: write_parquet,
+    JSONL: write_jsonl,
+}
+
+def write_export(fields, rows, fmt: str, out: BinaryIO, chunk_rows=EXPORT_CHUNK_ROWS, types=None) -> int:
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {list(WRITERS)}")
+    return WRITERS[fmt](fields, rows, out, chunk_rows, types)
+
+def export_bytes(fields, rows, fmt: str, chunk_rows=EXPORT_CHUNK_ROWS, types=None) -> bytes:
+    out = io.BytesIO()
+    write_export(fields, rows, fmt, out, chunk_rows, types)
+    return out.getvalue()